@@ -1 +1,3 @@
 __version__ = "1.2.0"
+
+from .core import Raider
@@ -1,8 +1,12 @@
-import argparse, asyncio, sys, time, httpx, json, csv
+import argparse, asyncio, sys, time, json, csv
 from rich.console import Console
+from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn, TaskProgressColumn
 from .core import Raider
-from .utils import VERSION, get_tld_extractor
+from .ctindex import CertNameIndex
+from .dashboard import ScanStats, DashboardLive
+from .profiler import Profiler, span
+from .utils import VERSION, get_tld_extractor, get_ct_index_path
 
 console = Console()
 _silent = False
@@ -120,51 +124,86 @@ def close_output_stream(stream):
     except OSError as e:
         cprint(f"[red]Error:[/] Could not finalize {stream['path']}: {e}")
 
-async def scan_domains(raider, domains, max_concurrent=10, output_stream=None):
+async def scan_domains(raider, domains, max_concurrent=10, output_stream=None, dashboard=False):
     results = []
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def scan_with_semaphore(client, domain):
-        async with semaphore:
-            raw = await raider.analyze(client, domain)
-            return raider.summarize(domain, raw)
-            
-    limits = httpx.Limits(max_keepalive_connections=max_concurrent, max_connections=max_concurrent * 2)
-    async with httpx.AsyncClient(
-        verify=False,
-        follow_redirects=True,
-        limits=limits,
-        timeout=httpx.Timeout(15.0, connect=5.0)
-    ) as client:
-        tasks = [scan_with_semaphore(client, domain) for domain in domains]
-        
-        if _silent:
-            for coro in asyncio.as_completed(tasks):
-                result = await coro
-                results.append(result)
-                write_output_stream(output_stream, result)
-            return results
-        
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]{task.description}"),
-            BarColumn(bar_width=24),
-            TaskProgressColumn(),
-            TimeElapsedColumn(),
-            console=console,
-            transient=True
-        ) as progress:
-            task = progress.add_task("", total=len(domains))
-            
-            for coro in asyncio.as_completed(tasks):
-                result = await coro
-                progress.console.print(format_result(result))
-                results.append(result)
-                write_output_stream(output_stream, result)
-                progress.advance(task)
-                
+    profiler = raider.profiler
+    watcher = asyncio.ensure_future(profiler.watch_loop()) if profiler else None
+
+    async with raider.create_client(max_concurrent) as client:
+        summaries = raider.scan(domains, concurrency=max_concurrent, client=client)
+        try:
+            if _silent:
+                async for result in summaries:
+                    results.append(result)
+                    with span(profiler, "write", result["domain"], cpu=True):
+                        write_output_stream(output_stream, result)
+                return results
+
+            if dashboard:
+                stats = ScanStats(len(domains), raider.analyzers, raider.hedgers)
+                raider.monitor = stats
+                try:
+                    with DashboardLive(stats, console=console, refresh_per_second=2, profiler=profiler):
+                        async for result in summaries:
+                            with span(profiler, "aggregate", result["domain"], cpu=True):
+                                stats.add_result(result)
+                            results.append(result)
+                            with span(profiler, "write", result["domain"], cpu=True):
+                                write_output_stream(output_stream, result)
+                finally:
+                    raider.monitor = None
+                return results
+
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[bold blue]{task.description}"),
+                BarColumn(bar_width=24),
+                TaskProgressColumn(),
+                TimeElapsedColumn(),
+                console=console,
+                transient=True
+            ) as progress:
+                task = progress.add_task("", total=len(domains))
+
+                async for result in summaries:
+                    with span(profiler, "render", result["domain"], cpu=True):
+                        progress.console.print(format_result(result))
+                    results.append(result)
+                    with span(profiler, "write", result["domain"], cpu=True):
+                        write_output_stream(output_stream, result)
+                    progress.advance(task)
+        finally:
+            await summaries.aclose()
+            if watcher:
+                watcher.cancel()
+                await asyncio.gather(watcher, return_exceptions=True)
+
     return results
 
+def report_profile(profiler):
+    try:
+        paths = profiler.export()
+    except OSError as e:
+        cprint(f"[red]Error:[/] Could not write profile: {e}")
+        return
+
+    table = Table(box=None, padding=(0, 2), header_style="dim")
+    table.add_column("stage")
+    table.add_column("count", justify="right")
+    table.add_column("total s", justify="right")
+    table.add_column("mean ms", justify="right")
+    table.add_column("max ms", justify="right")
+    for row in profiler.breakdown():
+        table.add_row(row["stage"], str(row["count"]), f"{row['total_s']:.3f}", f"{row['mean_ms']:.3f}", f"{row['max_ms']:.3f}")
+
+    lag = profiler.loop_lag
+    mean_lag = lag["total"] / lag["samples"] * 1000 if lag["samples"] else 0.0
+    cprint("")
+    cprint(table)
+    cprint(f"[dim]Event loop lag mean {mean_lag:.2f} ms, max {lag['max'] * 1000:.2f} ms, peak {lag['max_tasks']} tasks[/]")
+    for path in paths:
+        cprint(f"[dim]Profile saved to [cyan]{path}[/][/]")
+
 def main():
     global _silent
     
@@ -174,10 +213,30 @@ def main():
     parser.add_argument("-o", "--output", help="Output file (.txt, .json, .csv)")
     parser.add_argument("-t", "--threads", type=int, default=10, help="Number of concurrent threads")
     parser.add_argument("--json", action="store_true", help="Output results as JSON to stdout")
+    parser.add_argument("--dashboard", action="store_true", help="Show an aggregated live dashboard instead of per-domain lines")
+    parser.add_argument("--hedge", nargs="?", type=float, const=0.1, metavar="RATIO", help="Re-send slow HTTP provider calls after their p95 latency, capped at RATIO extra calls (default: 0.1)")
+    parser.add_argument("--profile", nargs="?", const="raider-profile", metavar="PREFIX", help="Time every pipeline stage and write PREFIX.trace.json (Chrome/Perfetto) and PREFIX.stages.json")
+    parser.add_argument("--profile-cpu", action="store_true", help="With --profile, also write a cProfile dump of the CPU-bound stages to PREFIX.prof")
+    parser.add_argument("--ct-index", nargs="?", const="", metavar="PATH", help="Use a local certificate name index instead of querying crt.sh")
+    parser.add_argument("--ct-index-add", nargs="+", metavar="DUMP", help="Append CT name dumps (.csv, .json, .ndjson, .txt) to the local index and exit")
     args = parser.parse_args()
 
     _silent = args.json
 
+    ct_index = args.ct_index
+    if ct_index == "" or (ct_index is None and args.ct_index_add):
+        ct_index = str(get_ct_index_path())
+
+    if args.ct_index_add:
+        try:
+            start_time = time.time()
+            total = CertNameIndex.append(ct_index, args.ct_index_add)
+        except (OSError, ValueError) as e:
+            cprint(f"[red]Error:[/] Could not update index: {e}")
+            return
+        cprint(f"[dim]Indexed [cyan]{total}[/] names in [cyan]{ct_index}[/] ({time.time() - start_time:.2f} seconds)[/]")
+        return
+
     banner = rf"""[bold cyan]
     ▘ ▌    
 ▛▘▀▌▌▛▌█▌▛▘
@@ -185,19 +244,30 @@ def main():
 [white][dim]pajarori[/dim][/white]
 """
 
+    profiler = None
+    if args.profile:
+        try:
+            profiler = Profiler(args.profile, cpu=args.profile_cpu)
+        except OSError as e:
+            cprint(f"[red]Error:[/] Could not write profile: {e}")
+            return
+
     domains = []
     
     if not sys.stdin.isatty():
-        domains.extend([line.strip() for line in sys.stdin if line.strip()])
+        with span(profiler, "input"):
+            domains.extend([line.strip() for line in sys.stdin if line.strip()])
 
     if args.domain:
         domains.append(args.domain)
     elif args.list:
         try:
-            with open(args.list, "r") as f:
+            with span(profiler, "input"), open(args.list, "r") as f:
                 domains.extend([line.strip() for line in f if line.strip()])
         except OSError as e:
             cprint(f"[red]Error:[/] Could not read file: {e}")
+            if profiler:
+                profiler.close()
             return
             
     seen = set()
@@ -211,7 +281,8 @@ def main():
         return domain_str
         
     for d in domains:
-        root_d = get_root_domain(d)
+        with span(profiler, "normalize", d, cpu=True):
+            root_d = get_root_domain(d)
         if root_d:
             root_d = root_d.lower()
         if root_d and root_d not in seen:
@@ -223,38 +294,60 @@ def main():
     if not domains:
         cprint(banner)
         cprint("[red]No domains provided. Use -d, -l, or pipe input.[/]")
+        if profiler:
+            profiler.close()
         return
         
     cprint(banner)
     cprint(f"[dim]Checking [cyan]{len(domains)}[/] domains[/]\n")
     
-    raider = Raider()
+    if ct_index:
+        try:
+            CertNameIndex(ct_index).close()
+        except (OSError, ValueError) as e:
+            cprint(f"[yellow]Warning:[/] Could not open certificate index: {e}. CrtSh scores will be unavailable.\n")
+
+    raider = Raider(ct_index=ct_index, hedge_ratio=args.hedge, profiler=profiler)
     start_time = time.time()
     output_stream = None
     results = []
     interrupted = False
+    scanned = False
     if args.output and not args.json:
         output_stream = open_output_stream(args.output)
     try:
-        results = asyncio.run(scan_domains(raider, domains, max_concurrent=args.threads, output_stream=output_stream))
+        results = asyncio.run(scan_domains(raider, domains, max_concurrent=args.threads, output_stream=output_stream, dashboard=args.dashboard))
+        scanned = True
     except KeyboardInterrupt:
         interrupted = True
     finally:
         close_output_stream(output_stream)
+        if profiler and not scanned and not interrupted:
+            report_profile(profiler)
     
     if interrupted:
         elapsed = time.time() - start_time
         cprint(f"\n[yellow]Interrupted by user (Ctrl+C).[/]")
         cprint(f"[dim]Stopped after {elapsed:.2f} seconds.[/]")
+        if profiler:
+            report_profile(profiler)
         return
     
-    if args.json:
-        print(json.dumps(results, indent=2, default=str))
-    elif args.output and not output_stream:
-        export_results(results, args.output)
+    with span(profiler, "output"):
+        if args.json:
+            print(json.dumps(results, indent=2, default=str))
+        elif args.output and not output_stream:
+            export_results(results, args.output)
     
     elapsed = time.time() - start_time
     cprint(f"\n[dim]Scan complete in {elapsed:.2f} seconds.[/]")
+    for provider_id, hedger in raider.hedgers.items():
+        stats = hedger.stats()
+        cprint(f"[dim]{raider.analyzers[provider_id].name}: hedged {stats['hedges']}/{stats['calls']} calls, hedge won {stats['wins']}[/]")
+    dns_stats = raider.dns.stats
+    cprint(f"[dim]DNS cache: {dns_stats['hits']} hits, {dns_stats['negative_hits']} negative hits, {dns_stats['misses']} misses, {dns_stats['prefetches']} prefetches, {dns_stats['fallbacks']} system fallbacks[/]")
+    if profiler:
+        report_profile(profiler)
 
 if __name__ == "__main__":
     main()
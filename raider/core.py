@@ -1,33 +1,141 @@
 import asyncio, httpx
 from .utils import TIERS, is_safe_domain
+from .hedge import Hedger
+from .profiler import span
+from .resolver import DNSCache, CachedNetworkBackend
 from .provider.tranco import TrancoProvider
 from .provider.openpage import OpenPageProvider
 from .provider.crtsh import CrtShProvider
 from .provider.whois import WhoisProvider
 
 class Raider:
-    def __init__(self):
+    def __init__(self, ct_index=None, providers=None, hedge_ratio=None, dns=None, profiler=None):
+        self.dns = dns if dns is not None else DNSCache()
         self.analyzers = {
             "tranco": TrancoProvider(),
             "openpage": OpenPageProvider(),
-            "crtsh": CrtShProvider(),
-            "whois": WhoisProvider(),
+            "crtsh": CrtShProvider(index_path=ct_index, dns=self.dns),
+            "whois": WhoisProvider(dns=self.dns),
         }
-        
+        self.monitor = None
+        self.profiler = profiler
+        self.hedge_ratio = hedge_ratio
+        self.hedgers = {}
+        for provider_id, provider in self.analyzers.items():
+            self._add_hedger(provider_id, provider)
+        for provider_id, provider in (providers or {}).items():
+            self.register(provider_id, provider)
+
+    def register(self, provider_id, provider):
+        for attr in ("name", "weight", "analyze", "normalize"):
+            if not hasattr(provider, attr):
+                raise TypeError(f"provider {provider_id!r} is missing {attr!r}")
+        self.analyzers[provider_id] = provider
+        self._add_hedger(provider_id, provider)
+
+    def _add_hedger(self, provider_id, provider):
+        if self.hedge_ratio and getattr(provider, "hedge", False):
+            self.hedgers[provider_id] = Hedger(max_ratio=self.hedge_ratio)
+        else:
+            self.hedgers.pop(provider_id, None)
+
+    def create_client(self, max_concurrent=10):
+        limits = httpx.Limits(max_keepalive_connections=max_concurrent, max_connections=max_concurrent * 2)
+        transport = httpx.AsyncHTTPTransport(verify=False, limits=limits)
+        pool = getattr(transport, "_pool", None)
+        if hasattr(pool, "_network_backend"):
+            pool._network_backend = CachedNetworkBackend(self.dns)
+        return httpx.AsyncClient(
+            transport=transport,
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0, connect=5.0)
+        )
+
     async def analyze(self, client: httpx.AsyncClient, domain: str):
+        self.dns.bind(asyncio.get_running_loop())
         if not is_safe_domain(domain):
             return [(provider_id, provider, None) for provider_id, provider in self.analyzers.items()]
 
         async def fetch(provider_id, provider):
+            monitor = self.monitor
+            if monitor:
+                monitor.provider_started(provider_id)
+            hedger = self.hedgers.get(provider_id)
             try:
-                value = await provider.analyze(client, domain)
+                with span(self.profiler, f"provider:{provider_id}", domain):
+                    if hedger:
+                        value = await hedger.run(lambda: provider.analyze(client, domain))
+                    else:
+                        value = await provider.analyze(client, domain)
             except Exception:
                 value = None
+            if monitor:
+                monitor.provider_finished(provider_id, value)
             return provider_id, provider, value
 
         tasks = [fetch(provider_id, provider) for provider_id, provider in self.analyzers.items()]
         return await asyncio.gather(*tasks)
 
+    async def scan(self, domains, concurrency=10, client=None):
+        if client is None:
+            async with self.create_client(concurrency) as client:
+                summaries = self.scan(domains, concurrency=concurrency, client=client)
+                try:
+                    async for summary in summaries:
+                        yield summary
+                finally:
+                    await summaries.aclose()
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Queue()
+        pending = set()
+
+        async def scan_one(domain):
+            raw = await self.analyze(client, domain)
+            with span(self.profiler, "score", domain, cpu=True):
+                return self.summarize(domain, raw)
+
+        def spawn(domain):
+            task = asyncio.ensure_future(scan_one(domain))
+            pending.add(task)
+            task.add_done_callback(done.put_nowait)
+
+        async def admit(domain):
+            with span(self.profiler, "semaphore", domain, lane=True):
+                await semaphore.acquire()
+            spawn(domain)
+
+        async def produce():
+            if hasattr(domains, "__aiter__"):
+                async for domain in domains:
+                    await admit(domain)
+            else:
+                for domain in domains:
+                    await admit(domain)
+
+        producer = asyncio.ensure_future(produce())
+        producer.add_done_callback(done.put_nowait)
+        producing = True
+        try:
+            while producing or pending:
+                task = await done.get()
+                if task is producer:
+                    producing = False
+                    task.result()
+                    continue
+                pending.discard(task)
+                semaphore.release()
+                summary = task.result()
+                yield summary
+                if self.profiler:
+                    self.profiler.release(summary["domain"])
+        finally:
+            producer.cancel()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(producer, *pending, return_exceptions=True)
+
     def get_tier(self, score, calculated_providers):
         if calculated_providers == 0:
             return TIERS[-1]
@@ -59,7 +167,11 @@ class Raider:
         for provider_id, provider, value in results:
             normalized = None
             if value is not None:
-                normalized = provider.normalize(value)
+                try:
+                    normalized = provider.normalize(value)
+                except Exception:
+                    value = None
+            if value is not None:
                 score += normalized * provider.weight
                 total_weight += provider.weight
                 calculated_providers += 1
@@ -0,0 +1,227 @@
+import os, sys, io, csv, json, gzip, mmap, heapq, struct, tempfile
+from array import array
+
+MAGIC = b"RDCTIDX1"
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+SPAN = struct.Struct("<QQ")
+RUN_SIZE = 1_000_000
+
+def normalize_name(name):
+    name = name.strip().lower()
+    if name.startswith("*."):
+        name = name[2:]
+    if not name or any(c.isspace() for c in name):
+        return None
+    return name
+
+def reverse_name(name):
+    return ".".join(reversed(name.split(".")))
+
+def _open_text(path):
+    if str(path).endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+def _name_value(path, row):
+    value = row.get("name_value") if isinstance(row, dict) else None
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{path}: name_value must be a string, got {type(value).__name__}")
+    return value
+
+def _iter_name_values(path):
+    lower = str(path).lower()
+    if lower.endswith(".gz"):
+        lower = lower[:-3]
+    ext = lower.rsplit(".", 1)[-1] if "." in lower else "txt"
+
+    with _open_text(path) as f:
+        if ext == "csv":
+            for row in csv.DictReader(f):
+                value = row.get("name_value") or row.get("name")
+                if value:
+                    yield value
+        elif ext == "json":
+            try:
+                rows = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path} is not a JSON array: {e}") from None
+            if isinstance(rows, dict):
+                rows = [rows]
+            if not isinstance(rows, list):
+                raise ValueError(f"{path} is not a JSON array")
+            for row in rows:
+                value = _name_value(path, row)
+                if value:
+                    yield value
+        elif ext in ("ndjson", "jsonl"):
+            for line in f:
+                line = line.strip().rstrip(",")
+                if not line or line in ("[", "]"):
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                value = _name_value(path, row)
+                if value:
+                    yield value
+        else:
+            for line in f:
+                yield line
+
+def iter_dump_names(paths):
+    for path in paths:
+        found = False
+        for value in _iter_name_values(path):
+            for name in value.split("\n"):
+                name = normalize_name(name)
+                if name:
+                    found = True
+                    yield reverse_name(name).encode("utf-8")
+        if not found:
+            raise ValueError(f"{path} contains no certificate names")
+
+def _write_run(run_dir, names):
+    fd, run_path = tempfile.mkstemp(dir=run_dir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for key in sorted(names):
+            f.write(key + b"\n")
+    return run_path
+
+def _read_run(run_path):
+    with open(run_path, "rb") as f:
+        for line in f:
+            yield line[:-1]
+
+def sorted_dump_runs(paths, run_dir, run_size=RUN_SIZE):
+    runs = []
+    names = set()
+    for key in iter_dump_names(paths):
+        names.add(key)
+        if len(names) >= run_size:
+            runs.append(_write_run(run_dir, names))
+            names = set()
+    if names:
+        runs.append(_write_run(run_dir, names))
+    return runs
+
+class CertNameIndex:
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mm) < HEADER.size:
+                raise ValueError(f"{self.path} is not a certificate name index")
+            magic, self._count = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a certificate name index")
+            self._offsets = HEADER.size
+            self._blob = self._offsets + (self._count + 1) * OFFSET.size
+            if self._blob > len(self._mm):
+                raise ValueError(f"{self.path} is truncated")
+            end = OFFSET.unpack_from(self._mm, self._blob - OFFSET.size)[0]
+            if self._blob + end > len(self._mm):
+                raise ValueError(f"{self.path} is truncated")
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._key(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _key(self, i):
+        start, end = SPAN.unpack_from(self._mm, self._offsets + i * OFFSET.size)
+        return self._mm[self._blob + start:self._blob + end]
+
+    def _bisect(self, key):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def count(self, domain):
+        name = normalize_name(domain)
+        if not name:
+            return 0
+        key = reverse_name(name).encode("utf-8")
+        exact = self._bisect(key)
+        total = 1 if exact < self._count and self._key(exact) == key else 0
+        total += self._bisect(key + b"/") - self._bisect(key + b".")
+        return total
+
+    @classmethod
+    def write(cls, path, keys):
+        path = str(path)
+        tmp_path = f"{path}.tmp"
+        blob_path = f"{path}.blob.tmp"
+        offsets = array("Q", [0])
+        size = 0
+        previous = None
+
+        try:
+            with open(blob_path, "wb") as blob:
+                for key in keys:
+                    if key == previous:
+                        continue
+                    blob.write(key)
+                    size += len(key)
+                    offsets.append(size)
+                    previous = key
+
+            if sys.byteorder != "little":
+                offsets.byteswap()
+
+            with open(tmp_path, "wb") as f, open(blob_path, "rb") as blob:
+                f.write(HEADER.pack(MAGIC, len(offsets) - 1))
+                offsets.tofile(f)
+                while True:
+                    chunk = blob.read(1 << 20)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            for leftover in (blob_path, tmp_path):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+
+        return len(offsets) - 1
+
+    @classmethod
+    def append(cls, path, dump_paths):
+        path = str(path)
+        run_dir = os.path.dirname(os.path.abspath(path))
+        with tempfile.TemporaryDirectory(dir=run_dir, prefix=".ctindex-") as tmp_dir:
+            runs = [_read_run(run_path) for run_path in sorted_dump_runs(dump_paths, tmp_dir)]
+            if not os.path.exists(path):
+                return cls.write(path, heapq.merge(*runs))
+
+            with cls(path) as existing:
+                return cls.write(path, heapq.merge(iter(existing), *runs))
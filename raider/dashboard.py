@@ -0,0 +1,96 @@
+import time, heapq
+from itertools import count
+from rich.console import Group
+from rich.panel import Panel
+from rich.table import Table
+from rich.live import Live
+from .utils import TIERS
+from .profiler import span
+
+class ScanStats:
+    top_size = 10
+
+    def __init__(self, total, providers, hedgers=None):
+        self.total = total
+        self.completed = 0
+        self.started_at = time.monotonic()
+        self.tiers = {tier["name"]: 0 for tier in TIERS}
+        self.providers = {
+            provider_id: {"name": provider.name, "in_flight": 0, "ok": 0, "failed": 0}
+            for provider_id, provider in providers.items()
+        }
+        self.hedgers = hedgers or {}
+        self._top = []
+        self._seq = count()
+
+    def provider_started(self, provider_id):
+        row = self.providers.get(provider_id)
+        if row is not None:
+            row["in_flight"] += 1
+
+    def provider_finished(self, provider_id, value):
+        row = self.providers.get(provider_id)
+        if row is not None:
+            row["in_flight"] -= 1
+            row["ok" if value is not None else "failed"] += 1
+
+    def add_result(self, result):
+        self.completed += 1
+        tier = result.get("tier")
+        if tier in self.tiers:
+            self.tiers[tier] += 1
+
+        entry = (result.get("priority_score", 0), -next(self._seq), result.get("domain"), tier, result.get("color"))
+        if len(self._top) < self.top_size:
+            heapq.heappush(self._top, entry)
+        elif entry > self._top[0]:
+            heapq.heapreplace(self._top, entry)
+
+    def __rich__(self):
+        elapsed = time.monotonic() - self.started_at
+        completed = self.completed
+        rate = completed / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - completed)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "-"
+        colors = {tier["name"]: tier["color"] for tier in TIERS}
+
+        header = (
+            f"[bold cyan]{completed}[/]/[cyan]{self.total}[/] domains  "
+            f"[bold]{rate:.1f}[/]/s  [dim]elapsed[/] {elapsed:.0f}s  [dim]eta[/] {eta}\n"
+            + "  ".join(f"[{colors[name]}]{name}[/] {n}" for name, n in list(self.tiers.items()))
+        )
+
+        providers = Table(box=None, padding=(0, 2), header_style="dim")
+        providers.add_column("provider")
+        providers.add_column("in flight", justify="right")
+        providers.add_column("ok", justify="right")
+        providers.add_column("failed", justify="right")
+        providers.add_column("success", justify="right")
+        if self.hedgers:
+            providers.add_column("hedged/won", justify="right")
+        for provider_id, row in list(self.providers.items()):
+            done = row["ok"] + row["failed"]
+            success = f"{row['ok'] / done * 100:.0f}%" if done else "-"
+            cells = [row["name"], str(row["in_flight"]), str(row["ok"]), str(row["failed"]), success]
+            if self.hedgers:
+                hedger = self.hedgers.get(provider_id)
+                cells.append(f"{hedger.hedges}/{hedger.wins}" if hedger else "-")
+            providers.add_row(*cells)
+
+        top = Table(box=None, padding=(0, 2), header_style="dim")
+        top.add_column("priority", justify="right")
+        top.add_column("domain")
+        top.add_column("tier")
+        for score, _, domain, tier, color in sorted(list(self._top), reverse=True):
+            top.add_row(f"[{color}]{score:06.2f}[/]", f"[cyan]{domain}[/]", f"[{color}]{tier}[/]")
+
+        return Panel(Group(header, "", providers, "", top), title="raider", border_style="dim")
+
+class DashboardLive(Live):
+    def __init__(self, *args, profiler=None, **kwargs):
+        self.profiler = profiler
+        super().__init__(*args, **kwargs)
+
+    def refresh(self):
+        with span(self.profiler, "render"):
+            super().refresh()
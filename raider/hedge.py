@@ -0,0 +1,60 @@
+import asyncio, time
+from collections import deque
+
+def _has_value(task):
+    return not task.cancelled() and task.exception() is None and task.result() is not None
+
+class Hedger:
+    def __init__(self, max_ratio=0.1, quantile=0.95, min_samples=20, window=200):
+        self.max_ratio = max_ratio
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def delay(self):
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+
+    def _can_hedge(self):
+        return self.hedges < self.max_ratio * self.calls
+
+    async def run(self, factory):
+        self.calls += 1
+        start = time.monotonic()
+        delay = self.delay()
+        primary = asyncio.ensure_future(factory())
+        tasks = [primary]
+        pending = {primary}
+        winner = None
+
+        try:
+            if delay is not None and self._can_hedge():
+                _, pending = await asyncio.wait(pending, timeout=delay)
+                if pending and self._can_hedge():
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(factory())
+                    tasks.append(hedge)
+                    pending.add(hedge)
+            while True:
+                winner = next((task for task in tasks if task not in pending and _has_value(task)), None)
+                if winner is not None or not pending:
+                    break
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            winner = primary
+        elif winner is not primary:
+            self.wins += 1
+        self.samples.append(time.monotonic() - start)
+        return winner.result()
+
+    def stats(self):
+        return {"calls": self.calls, "hedges": self.hedges, "wins": self.wins}
@@ -0,0 +1,173 @@
+import json, time, heapq, asyncio, threading, cProfile
+from contextlib import contextmanager, nullcontext
+
+class Profiler:
+    def __init__(self, prefix, cpu=False):
+        self.prefix = prefix
+        self.origin = time.perf_counter()
+        self.trace_path = f"{prefix}.trace.json"
+        self._trace = open(self.trace_path, "w")
+        self._trace.write("[\n")
+        self._first = True
+        self._lock = threading.Lock()
+        self.totals = {}
+        self.loop_lag = {"samples": 0, "total": 0.0, "max": 0.0, "max_tasks": 0}
+        self.cpu = cProfile.Profile() if cpu else None
+        self._lanes = {}
+        self._free_lanes = []
+        self._next_lane = 1
+        self._tracks = {"pipeline": 0}
+        self._named = set()
+        self._name_lane(0, "main")
+
+    def _ts(self, t):
+        return round((t - self.origin) * 1_000_000, 3)
+
+    def _emit(self, event):
+        if self._trace is None:
+            return
+        if not self._first:
+            self._trace.write(",\n")
+        self._trace.write(json.dumps(event, separators=(",", ":")))
+        self._first = False
+
+    def _name_lane(self, pid, name):
+        self._emit({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}})
+
+    def _track(self, pid, stage):
+        track = stage if stage.startswith("provider:") else "pipeline"
+        tid = self._tracks.get(track)
+        if tid is None:
+            tid = self._tracks[track] = len(self._tracks)
+        if (pid, tid) not in self._named:
+            self._named.add((pid, tid))
+            self._emit({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": track}})
+        return tid
+
+    def lane(self, domain):
+        pid = self._lanes.get(domain)
+        if pid is None:
+            if self._free_lanes:
+                pid = heapq.heappop(self._free_lanes)
+            else:
+                pid = self._next_lane
+                self._next_lane += 1
+                self._name_lane(pid, f"slot {pid}")
+            self._lanes[domain] = pid
+        return pid
+
+    def release(self, domain):
+        pid = self._lanes.pop(domain, None)
+        if pid is not None:
+            heapq.heappush(self._free_lanes, pid)
+
+    def record(self, stage, start, end, domain=None, lane=False):
+        with self._lock:
+            self._record(stage, start, end, domain, lane)
+
+    def _record(self, stage, start, end, domain, lane):
+        duration = end - start
+        total = self.totals.get(stage)
+        if total is None:
+            total = self.totals[stage] = [0, 0.0, 0.0]
+        total[0] += 1
+        total[1] += duration
+        total[2] = max(total[2], duration)
+
+        pid = self.lane(domain) if lane and domain else self._lanes.get(domain, 0)
+        event = {
+            "name": stage,
+            "cat": stage.split(":", 1)[0],
+            "ph": "X",
+            "ts": self._ts(start),
+            "dur": round(duration * 1_000_000, 3),
+            "pid": pid,
+            "tid": self._track(pid, stage),
+        }
+        if domain:
+            event["args"] = {"domain": domain}
+        self._emit(event)
+
+    @contextmanager
+    def span(self, stage, domain=None, cpu=False, lane=False):
+        profile = self.cpu if cpu else None
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self.record(stage, start, time.perf_counter(), domain, lane)
+
+    async def watch_loop(self, interval=0.1):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            now = loop.time()
+            lag = max(0.0, now - expected)
+            tasks = len(asyncio.all_tasks())
+
+            stats = self.loop_lag
+            stats["samples"] += 1
+            stats["total"] += lag
+            stats["max"] = max(stats["max"], lag)
+            stats["max_tasks"] = max(stats["max_tasks"], tasks)
+            with self._lock:
+                self._emit({
+                    "name": "event loop",
+                    "ph": "C",
+                    "ts": self._ts(time.perf_counter()),
+                    "pid": 0,
+                    "tid": 0,
+                    "args": {"lag_ms": round(lag * 1000, 3), "tasks": tasks},
+                })
+
+    def breakdown(self):
+        rows = []
+        for stage, (count, total, worst) in self.totals.items():
+            rows.append({
+                "stage": stage,
+                "count": count,
+                "total_s": round(total, 6),
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "max_ms": round(worst * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    def close(self):
+        with self._lock:
+            if self._trace is not None:
+                self._trace.write("\n]\n")
+                self._trace.close()
+                self._trace = None
+
+    def export(self):
+        self.close()
+        summary_path = f"{self.prefix}.stages.json"
+        lag = self.loop_lag
+        with open(summary_path, "w") as f:
+            json.dump({
+                "stages": self.breakdown(),
+                "event_loop": {
+                    "samples": lag["samples"],
+                    "mean_lag_ms": round(lag["total"] / lag["samples"] * 1000, 3) if lag["samples"] else 0.0,
+                    "max_lag_ms": round(lag["max"] * 1000, 3),
+                    "max_tasks": lag["max_tasks"],
+                },
+            }, f, indent=2)
+
+        paths = [self.trace_path, summary_path]
+        if self.cpu:
+            cpu_path = f"{self.prefix}.prof"
+            self.cpu.dump_stats(cpu_path)
+            paths.append(cpu_path)
+        return paths
+
+def span(profiler, stage, domain=None, cpu=False, lane=False):
+    if profiler is None:
+        return nullcontext()
+    return profiler.span(stage, domain, cpu, lane)
@@ -1,4 +1,5 @@
 import httpx, asyncio, threading, queue, time
+from ..ctindex import CertNameIndex
 
 try:
     import psycopg
@@ -9,6 +10,7 @@ class CrtShProvider:
     name = "CrtSh"
     weight = 0.10
     pool_size = 6
+    pg_host = "crt.sh"
     sql = """
 WITH hits AS (
     SELECT c.id
@@ -27,7 +29,11 @@ FROM names
 WHERE name = %s OR name LIKE %s;
 """.strip()
 
-    def __init__(self):
+    def __init__(self, index_path=None, dns=None):
+        self.index_path = index_path
+        self.dns = dns
+        self._index = None
+        self._index_failed = False
         self._pg_pool = queue.Queue(maxsize=self.pool_size)
         self._pg_pool_ready = False
         self._pg_disabled = False
@@ -37,8 +43,16 @@ WHERE name = %s OR name LIKE %s;
     def _connect_pg(self):
         if psycopg is None:
             raise RuntimeError("psycopg not installed")
+        hosts = {"host": self.pg_host}
+        if self.dns is not None:
+            try:
+                addresses = self.dns.resolve_threadsafe(self.pg_host)[:2]
+            except Exception:
+                addresses = []
+            if addresses:
+                hosts = {"host": ",".join([self.pg_host] * len(addresses)), "hostaddr": ",".join(addresses)}
         conn = psycopg.connect(
-            host="crt.sh",
+            **hosts,
             port=5432,
             dbname="certwatch",
             user="guest",
@@ -138,7 +152,26 @@ WHERE name = %s OR name LIKE %s;
                 except queue.Full:
                     self._close_conn(conn)
 
+    def _get_index(self):
+        if self._index is None and not self._index_failed:
+            try:
+                self._index = CertNameIndex(self.index_path)
+            except (OSError, ValueError):
+                self._index_failed = True
+        return self._index
+
+    def _index_count(self, domain: str):
+        index = self._get_index()
+        if index is None:
+            return None
+        try:
+            return index.count(domain)
+        except Exception:
+            return None
+
     async def analyze(self, client: httpx.AsyncClient, domain: str):
+        if self.index_path:
+            return self._index_count(domain)
         return await asyncio.to_thread(self._pg_count, domain)
 
     def normalize(self, value):
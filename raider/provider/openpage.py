@@ -3,6 +3,7 @@ import os, httpx
 class OpenPageProvider:
     name = "OpenPage"
     weight = 0.30
+    hedge = True
 
     def __init__(self):
         self.api_url = "https://openpagerank.com/api/v1.0/getPageRank"
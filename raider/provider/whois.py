@@ -1,10 +1,59 @@
-import whois, asyncio
+import whois, asyncio, os, socket
 from datetime import datetime
+from whois import NICClient, WhoisEntry
+from ..resolver import connect_staggered
+
+class _ResolvingSocket:
+    def __init__(self, dns):
+        self._dns = dns
+        self._sock = None
+        self._timeout = None
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+        if self._sock is not None:
+            self._sock.settimeout(timeout)
+
+    def connect(self, address):
+        host, port = address
+        try:
+            addresses = self._dns.resolve_threadsafe(host)
+        except Exception:
+            addresses = []
+        if not addresses:
+            self._sock = socket.create_connection(address, self._timeout)
+            return
+        self._sock, connected = connect_staggered(addresses, port, self._timeout)
+        self._dns.report_connected(connected)
+
+    def send(self, data):
+        return self._sock.send(data)
+
+    def recv(self, size):
+        return self._sock.recv(size)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+class _CachedNICClient(NICClient):
+    def __init__(self, dns):
+        super().__init__()
+        self._dns = dns
+
+    def get_socket(self):
+        if "SOCKS" in os.environ:
+            return NICClient.get_socket()
+        return _ResolvingSocket(self._dns)
 
 class WhoisProvider:
     name = "Whois"
     weight = 0.20
 
+    def __init__(self, dns=None):
+        self.dns = dns
+
     def _pick_date(self, value):
         if not value:
             return None
@@ -38,15 +87,20 @@ class WhoisProvider:
             return (dt - datetime.now()).days
         except Exception:
             return None
-        
+
+    def _lookup(self, domain):
+        if self.dns is None:
+            return whois.whois(domain, quiet=True, ignore_socket_errors=True)
+
+        domain = whois.extract_domain(domain).encode("idna").decode("utf-8")
+        text = _CachedNICClient(self.dns).whois_lookup(None, domain, 0, quiet=True, ignore_socket_errors=True)
+        if not text:
+            return None
+        return WhoisEntry.load(domain, text)
+
     async def analyze(self, client, domain: str):
         try:
-            domain_info = await asyncio.to_thread(
-                whois.whois,
-                domain,
-                quiet=True,
-                ignore_socket_errors=True,
-            )
+            domain_info = await asyncio.to_thread(self._lookup, domain)
 
             created = self._pick_date(getattr(domain_info, "creation_date", None))
             updated = self._pick_date(getattr(domain_info, "updated_date", None))
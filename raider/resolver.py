@@ -0,0 +1,404 @@
+import asyncio, errno, ipaddress, random, selectors, socket, struct, time
+from concurrent.futures import ThreadPoolExecutor
+import httpcore
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SOA = 6
+TYPE_AAAA = 28
+RCODE_NXDOMAIN = 3
+HEADER = struct.Struct(">HHHHHH")
+RECORD = struct.Struct(">HHIH")
+
+def read_nameservers(path="/etc/resolv.conf"):
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver" and "%" not in parts[1]:
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers[:3]
+
+def read_hosts(path="/etc/hosts"):
+    hosts = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                if len(parts) < 2 or "%" in parts[0]:
+                    continue
+                try:
+                    ipaddress.ip_address(parts[0])
+                except ValueError:
+                    continue
+                for name in parts[1:]:
+                    addresses = hosts.setdefault(name.rstrip(".").lower(), [])
+                    if parts[0] not in addresses:
+                        addresses.append(parts[0])
+    except OSError:
+        pass
+    return hosts
+
+def build_query(qid, name, qtype):
+    labels = b"".join(bytes([len(label)]) + label for label in name.encode("idna").split(b".") if label)
+    return HEADER.pack(qid, 0x0100, 1, 0, 0, 0) + labels + b"\x00" + struct.pack(">HH", qtype, 1)
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+def parse_response(data, qid):
+    rid, flags, qdcount, ancount, nscount, _ = HEADER.unpack_from(data, 0)
+    if rid != qid or not flags & 0x8000:
+        raise ValueError("unexpected DNS response")
+    if flags & 0x0200:
+        raise ValueError("truncated DNS response")
+
+    rcode = flags & 0x000F
+    if rcode not in (0, RCODE_NXDOMAIN):
+        raise ValueError(f"DNS server returned rcode {rcode}")
+
+    offset = HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    addresses = []
+    ttl = None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlength = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        rdata = data[offset:offset + rdlength]
+        offset += rdlength
+        if rtype == TYPE_A and rdlength == 4:
+            addresses.append(socket.inet_ntop(socket.AF_INET, rdata))
+        elif rtype == TYPE_AAAA and rdlength == 16:
+            addresses.append(socket.inet_ntop(socket.AF_INET6, rdata))
+        elif rtype != TYPE_CNAME:
+            continue
+        ttl = rttl if ttl is None else min(ttl, rttl)
+
+    if addresses:
+        return addresses, ttl
+
+    negative_ttl = None
+    for _ in range(nscount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlength = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if rtype == TYPE_SOA:
+            end = _skip_name(data, _skip_name(data, offset))
+            minimum = struct.unpack_from(">I", data, end + 16)[0]
+            negative_ttl = min(rttl, minimum)
+        offset += rdlength
+    return [], negative_ttl
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+def interleave(addresses, prefer_ipv6=True):
+    v6 = [a for a in addresses if ":" in a]
+    v4 = [a for a in addresses if ":" not in a]
+    first, second = (v6, v4) if prefer_ipv6 else (v4, v6)
+    ordered = []
+    for i in range(max(len(first), len(second))):
+        ordered.extend(group[i] for group in (first, second) if i < len(group))
+    return ordered
+
+def connect_staggered(addresses, port, timeout=None, delay=0.25):
+    selector = selectors.DefaultSelector()
+    queue = list(addresses)
+    attempts = {}
+    winner = None
+    last_error = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    next_start = time.monotonic()
+
+    try:
+        while winner is None and (queue or attempts):
+            now = time.monotonic()
+            if queue and (not attempts or now >= next_start):
+                address = queue.pop(0)
+                sock = socket.socket(socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                err = sock.connect_ex((address, port))
+                if err == 0:
+                    winner = (sock, address)
+                    break
+                if err in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    attempts[sock] = address
+                    selector.register(sock, selectors.EVENT_WRITE)
+                else:
+                    sock.close()
+                    last_error = OSError(err, f"{address}: {errno.errorcode.get(err, err)}")
+                next_start = now + delay
+                continue
+
+            waits = [next_start - now] if queue else []
+            if deadline is not None:
+                if now >= deadline:
+                    raise socket.timeout(f"timed out connecting to port {port}")
+                waits.append(deadline - now)
+            for key, _ in selector.select(max(0, min(waits)) if waits else None):
+                sock = key.fileobj
+                selector.unregister(sock)
+                address = attempts.pop(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0 and winner is None:
+                    winner = (sock, address)
+                else:
+                    sock.close()
+                    if err:
+                        last_error = OSError(err, f"{address}: {errno.errorcode.get(err, err)}")
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
+
+    if winner is None:
+        raise last_error or OSError(f"could not connect to port {port}")
+    sock, address = winner
+    sock.settimeout(timeout)
+    return sock, address
+
+class DNSCache:
+    min_ttl = 5
+    max_ttl = 3600
+    fallback_ttl = 60
+    negative_ttl = 30
+    prefetch_ratio = 0.1
+    query_timeout = 2.0
+    fallback_workers = 4
+    port = 53
+
+    def __init__(self, nameservers=None, hosts=None):
+        self.nameservers = read_nameservers() if nameservers is None else nameservers
+        self.hosts = read_hosts() if hosts is None else hosts
+        self.prefer_ipv6 = True
+        self.stats = {"hits": 0, "misses": 0, "negative_hits": 0, "prefetches": 0, "fallbacks": 0}
+        self._entries = {}
+        self._inflight = {}
+        self._background = set()
+        self._loop = None
+        self._executor = None
+
+    def _clamp(self, ttl, default):
+        if ttl is None:
+            ttl = default
+        return max(self.min_ttl, min(self.max_ttl, ttl))
+
+    async def _query(self, nameserver, name, qtype):
+        loop = asyncio.get_running_loop()
+        qid = random.getrandbits(16)
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(lambda: _QueryProtocol(future), remote_addr=(nameserver, self.port))
+        try:
+            transport.sendto(build_query(qid, name, qtype))
+            data = await asyncio.wait_for(future, self.query_timeout)
+        finally:
+            transport.close()
+        return parse_response(data, qid)
+
+    async def _query_type(self, name, qtype):
+        last_error = None
+        for nameserver in self.nameservers:
+            try:
+                return await self._query(nameserver, name, qtype)
+            except (OSError, ValueError, IndexError, struct.error, asyncio.TimeoutError) as e:
+                last_error = e
+        raise last_error or OSError("no nameservers configured")
+
+    async def _getaddrinfo(self, host):
+        self.stats["fallbacks"] += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.fallback_workers, thread_name_prefix="raider-dns")
+        try:
+            infos = await asyncio.get_running_loop().run_in_executor(
+                self._executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM
+            )
+        except OSError:
+            return [], self.negative_ttl
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            if family in (socket.AF_INET, socket.AF_INET6) and sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        return addresses, self.fallback_ttl if addresses else self.negative_ttl
+
+    async def _lookup(self, host):
+        if host in self.hosts:
+            addresses, ttl = list(self.hosts[host]), self.fallback_ttl
+        elif "." not in host or not self.nameservers:
+            addresses, ttl = await self._getaddrinfo(host)
+        else:
+            answers = await asyncio.gather(
+                self._query_type(host, TYPE_AAAA),
+                self._query_type(host, TYPE_A),
+                return_exceptions=True,
+            )
+            if all(isinstance(answer, Exception) for answer in answers):
+                addresses, ttl = await self._getaddrinfo(host)
+            else:
+                addresses, ttls, negative_ttls = [], [], []
+                for answer in answers:
+                    if isinstance(answer, Exception):
+                        continue
+                    found, answer_ttl = answer
+                    addresses.extend(found)
+                    if answer_ttl is not None:
+                        (ttls if found else negative_ttls).append(answer_ttl)
+                ttl = min(ttls or [None]) if addresses else min(negative_ttls or [None])
+                if not addresses:
+                    fallback, fallback_ttl = await self._getaddrinfo(host)
+                    if fallback:
+                        addresses, ttl = fallback, fallback_ttl
+
+        ttl = self._clamp(ttl, self.fallback_ttl if addresses else self.negative_ttl)
+        self._entries[host] = (addresses, ttl, time.monotonic() + ttl)
+        return addresses
+
+    async def _refresh(self, host):
+        future = self._inflight.get(host)
+        if future is None:
+            future = self._inflight[host] = asyncio.ensure_future(self._lookup(host))
+            future.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return await asyncio.shield(future)
+
+    def _prefetch(self, host):
+        if host in self._inflight:
+            return
+        self.stats["prefetches"] += 1
+        task = asyncio.ensure_future(self._refresh(host))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def bind(self, loop):
+        self._loop = loop
+
+    async def resolve(self, host):
+        self._loop = asyncio.get_running_loop()
+        host = host.rstrip(".").lower()
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        entry = self._entries.get(host)
+        now = time.monotonic()
+        if entry and entry[2] > now:
+            addresses, ttl, expires = entry
+            self.stats["hits" if addresses else "negative_hits"] += 1
+            if expires - now < ttl * self.prefetch_ratio:
+                self._prefetch(host)
+            return interleave(addresses, self.prefer_ipv6)
+
+        self.stats["misses"] += 1
+        addresses = await self._refresh(host)
+        return interleave(addresses, self.prefer_ipv6)
+
+    def resolve_threadsafe(self, host, timeout=10):
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or loop.is_closed() or running is loop:
+            raise RuntimeError("DNSCache.resolve_threadsafe needs a running event loop in another thread")
+        return asyncio.run_coroutine_threadsafe(self.resolve(host), loop).result(timeout)
+
+    def report_connected(self, address):
+        self.prefer_ipv6 = ":" in address
+
+    async def connect(self, host, connect, delay=0.25):
+        addresses = await self.resolve(host)
+        if not addresses:
+            raise OSError(f"could not resolve {host}")
+
+        tasks = {}
+        pending = set()
+        extra = []
+        winner = None
+        last_error = None
+
+        def collect(done):
+            nonlocal winner, last_error
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    last_error = task.exception()
+                elif winner is None:
+                    winner = task
+                else:
+                    extra.append(task.result())
+
+        try:
+            for address in addresses:
+                task = asyncio.ensure_future(connect(address))
+                tasks[task] = address
+                pending.add(task)
+                done, pending = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+                if winner:
+                    break
+            while winner is None and pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+        except BaseException:
+            if winner is not None:
+                extra.append(winner.result())
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if not isinstance(result, BaseException):
+                    extra.append(result)
+            for stream in extra:
+                await stream.aclose()
+
+        if winner is None:
+            raise last_error or OSError(f"could not connect to {host}")
+        self.report_connected(tasks[winner])
+        return winner.result()
+
+class CachedNetworkBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, cache, backend=None):
+        self.cache = cache
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            return await self.cache.connect(
+                host,
+                lambda address: self.backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                ),
+            )
+        except httpcore.ConnectError:
+            raise
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self.backend.sleep(seconds)
@@ -48,6 +48,9 @@ def get_cache_dir():
     cache_dir.mkdir(exist_ok=True)
     return cache_dir
 
+def get_ct_index_path():
+    return get_data_dir() / "ctindex.bin"
+
 def get_tld_extractor():
     tld_cache_dir = get_cache_dir() / "tldextract"
     tld_cache_dir.mkdir(exist_ok=True)
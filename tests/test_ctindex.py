@@ -0,0 +1,96 @@
+import json
+import pytest
+from raider.ctindex import CertNameIndex, MAGIC, HEADER, reverse_name, sorted_dump_runs, _read_run
+
+def build(tmp_path, *names):
+    keys = sorted(reverse_name(name).encode("utf-8") for name in names)
+    path = tmp_path / "index.bin"
+    CertNameIndex.write(path, keys)
+    return path
+
+def test_count_includes_name_and_subdomains(tmp_path):
+    path = build(tmp_path, "example.com", "a.example.com", "b.a.example.com", "example-foo.com", "x.example-foo.com", "example.co", "com")
+    with CertNameIndex(path) as index:
+        assert index.count("example.com") == 3
+        assert index.count("*.EXAMPLE.com") == 3
+        assert index.count("a.example.com") == 2
+        assert index.count("example-foo.com") == 2
+        assert index.count("missing.com") == 0
+        assert index.count("") == 0
+
+def test_count_subdomains_without_apex(tmp_path):
+    path = build(tmp_path, "www.example.com", "api.example.com")
+    with CertNameIndex(path) as index:
+        assert index.count("example.com") == 2
+
+def test_write_skips_duplicates(tmp_path):
+    path = tmp_path / "index.bin"
+    assert CertNameIndex.write(path, [b"com.a", b"com.a", b"com.b"]) == 2
+    with CertNameIndex(path) as index:
+        assert list(index) == [b"com.a", b"com.b"]
+
+def test_append_merges_into_existing_index(tmp_path):
+    first = tmp_path / "first.txt"
+    first.write_text("a.example.com\nexample.com\n")
+    second = tmp_path / "second.ndjson"
+    second.write_text("\n".join(json.dumps({"name_value": value}) for value in ["b.example.com\n*.example.com", "a.example.com"]))
+    path = tmp_path / "index.bin"
+
+    assert CertNameIndex.append(path, [first]) == 2
+    assert CertNameIndex.append(path, [second]) == 3
+    with CertNameIndex(path) as index:
+        assert list(index) == [b"com.example", b"com.example.a", b"com.example.b"]
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".ctindex-") or p.name.endswith(".tmp")]
+
+def test_runs_are_sorted_and_deduplicated_across_runs(tmp_path):
+    dump = tmp_path / "names.txt"
+    dump.write_text("c.example.com\na.example.com\nc.example.com\nb.example.com\na.example.com\n")
+    runs = sorted_dump_runs([dump], tmp_path, run_size=2)
+    assert len(runs) == 3
+    for run in runs:
+        keys = list(_read_run(run))
+        assert keys == sorted(keys)
+
+    path = tmp_path / "index.bin"
+    CertNameIndex.append(path, [dump])
+    with CertNameIndex(path) as index:
+        assert list(index) == [b"com.example.a", b"com.example.b", b"com.example.c"]
+
+def test_append_reads_crtsh_json_array(tmp_path):
+    rows = [{"name_value": "a.example.com\n*.example.com"}, {"name_value": "b.example.com"}]
+    compact = tmp_path / "crt.json"
+    compact.write_text(json.dumps(rows))
+    pretty = tmp_path / "pretty.json"
+    pretty.write_text(json.dumps(rows, indent=2))
+
+    assert CertNameIndex.append(tmp_path / "compact.bin", [compact]) == 3
+    assert CertNameIndex.append(tmp_path / "pretty.bin", [pretty]) == 3
+
+def test_append_rejects_bad_dumps(tmp_path):
+    empty = tmp_path / "empty.json"
+    empty.write_text("[]")
+    wrong_type = tmp_path / "wrong.json"
+    wrong_type.write_text(json.dumps([{"name_value": ["a.example.com"]}]))
+    broken = tmp_path / "broken.json"
+    broken.write_text('[{"name_value": "a.example.com"')
+
+    for dump in (empty, wrong_type, broken):
+        with pytest.raises(ValueError):
+            CertNameIndex.append(tmp_path / "index.bin", [dump])
+    assert not (tmp_path / "index.bin").exists()
+
+def test_open_rejects_bad_magic_and_truncated_files(tmp_path):
+    path = build(tmp_path, "a.example.com", "b.example.com")
+    data = path.read_bytes()
+    cases = {
+        "short.bin": data[:HEADER.size - 1],
+        "magic.bin": b"NOTINDEX" + data[8:],
+        "offsets.bin": data[:HEADER.size + 8],
+        "blob.bin": data[:-1],
+        "count.bin": HEADER.pack(MAGIC, 1000) + data[HEADER.size:],
+    }
+    for name, contents in cases.items():
+        bad = tmp_path / name
+        bad.write_bytes(contents)
+        with pytest.raises(ValueError):
+            CertNameIndex(bad)
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from raider.hedge import Hedger
+
+def warm(hedger, latency=0.01):
+    hedger.samples.extend([latency] * hedger.min_samples)
+    hedger.calls = 100
+    return hedger
+
+def sequence(*steps):
+    steps = list(steps)
+    started = []
+
+    def factory():
+        delay, outcome = steps[len(started)]
+        started.append(delay)
+
+        async def call():
+            await asyncio.sleep(delay)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return call()
+
+    return factory, started
+
+def run(hedger, factory):
+    return asyncio.run(hedger.run(factory))
+
+def test_no_hedge_during_warm_up():
+    hedger = Hedger()
+    factory, started = sequence((0.05, "primary"), (0, "hedge"))
+    assert run(hedger, factory) == "primary"
+    assert len(started) == 1 and hedger.hedges == 0
+    assert hedger.delay() is None and len(hedger.samples) == 1
+
+def test_delay_is_the_configured_quantile():
+    hedger = Hedger(quantile=0.95, min_samples=20)
+    hedger.samples.extend(i / 100 for i in range(1, 21))
+    assert hedger.delay() == 0.2
+
+def test_hedge_wins():
+    hedger = warm(Hedger())
+    factory, started = sequence((0.5, "primary"), (0, "hedge"))
+    assert run(hedger, factory) == "hedge"
+    assert len(started) == 2 and hedger.hedges == 1 and hedger.wins == 1
+
+def test_primary_wins_after_hedge_is_sent():
+    hedger = warm(Hedger())
+    factory, started = sequence((0.05, "primary"), (0.5, "hedge"))
+    assert run(hedger, factory) == "primary"
+    assert len(started) == 2 and hedger.hedges == 1 and hedger.wins == 0
+
+def test_empty_hedge_does_not_beat_usable_primary():
+    hedger = warm(Hedger())
+    factory, _ = sequence((0.05, "primary"), (0, None))
+    assert run(hedger, factory) == "primary"
+    assert hedger.wins == 0
+
+def test_failed_primary_falls_through_to_usable_hedge():
+    hedger = warm(Hedger())
+    factory, _ = sequence((0.03, RuntimeError("boom")), (0.05, "hedge"))
+    assert run(hedger, factory) == "hedge"
+    assert hedger.wins == 1
+
+def test_primary_outcome_when_nothing_is_usable():
+    hedger = warm(Hedger())
+    factory, _ = sequence((0.05, RuntimeError("boom")), (0, None))
+    with pytest.raises(RuntimeError):
+        run(hedger, factory)
+    assert hedger.wins == 0
+
+    factory, _ = sequence((0.05, None), (0, RuntimeError("boom")))
+    assert run(hedger, factory) is None
+
+def test_extra_load_is_capped():
+    hedger = Hedger(max_ratio=0.1)
+    hedger.samples.extend([0.001] * hedger.min_samples)
+    factories = [sequence((0.05, "primary"), (0.05, "hedge")) for _ in range(30)]
+
+    async def main():
+        return await asyncio.gather(*(hedger.run(factory) for factory, _ in factories))
+
+    asyncio.run(main())
+    assert hedger.calls == 30 and hedger.hedges == 3
+    assert sum(len(started) for _, started in factories) == 33
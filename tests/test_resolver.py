@@ -0,0 +1,185 @@
+import asyncio, socket, time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from raider.resolver import DNSCache, connect_staggered, parse_response, read_hosts
+
+A_EXAMPLE = bytes.fromhex(
+    "1a2b81800001000100000000076578616d706c6503636f6d0000010001"
+    "c00c0001000100000e1000045db8d70e"
+)
+AAAA_EXAMPLE = bytes.fromhex(
+    "3c4d81800001000100000000076578616d706c6503636f6d00001c0001"
+    "c00c001c00010000012c001026062800021fcb07682080daaf6b8b2c"
+)
+CNAME_GITHUB = bytes.fromhex(
+    "5e6f81800001000200000000037777770667697468756203636f6d0000010001"
+    "c00c0005000100000e100002c010"
+    "c010000100010000003c00048c527904"
+)
+NXDOMAIN = bytes.fromhex(
+    "7081818300010000000100000e6d697373696e672d72616964657203636f6d0000010001"
+    "c01b0006000100000384004001610c67746c642d73657276657273036e657400056e73746c64"
+    "0c766572697369676e2d67727303636f6d006553f100000007080000038400093a8000000384"
+)
+NODATA_AAAA = bytes.fromhex(
+    "92a381800001000000010000076578616d706c6503636f6d00001c0001"
+    "c0140006000100000e10003a01610c67746c642d73657276657273c014056e73746c64"
+    "0c766572697369676e2d677273c0146553f100000007080000038400093a8000015180"
+)
+
+def test_parse_a_record():
+    assert parse_response(A_EXAMPLE, 0x1A2B) == (["93.184.215.14"], 3600)
+
+def test_parse_aaaa_record():
+    assert parse_response(AAAA_EXAMPLE, 0x3C4D) == (["2606:2800:21f:cb07:6820:80da:af6b:8b2c"], 300)
+
+def test_parse_cname_chain_uses_lowest_ttl():
+    assert parse_response(CNAME_GITHUB, 0x5E6F) == (["140.82.121.4"], 60)
+
+def test_parse_nxdomain_uses_soa_minimum():
+    assert parse_response(NXDOMAIN, 0x7081) == ([], 900)
+
+def test_parse_nodata_caps_soa_minimum_by_record_ttl():
+    assert parse_response(NODATA_AAAA, 0x92A3) == ([], 3600)
+
+def test_parse_rejects_wrong_id():
+    with pytest.raises(ValueError):
+        parse_response(A_EXAMPLE, 0x1A2C)
+
+def test_parse_rejects_truncated_and_servfail():
+    truncated = A_EXAMPLE[:2] + bytes([A_EXAMPLE[2] | 0x02]) + A_EXAMPLE[3:]
+    servfail = A_EXAMPLE[:3] + bytes([(A_EXAMPLE[3] & 0xF0) | 2]) + A_EXAMPLE[4:]
+    for packet in (truncated, servfail):
+        with pytest.raises(ValueError):
+            parse_response(packet, 0x1A2B)
+
+def test_read_hosts(tmp_path):
+    hosts = tmp_path / "hosts"
+    hosts.write_text("127.0.0.1 localhost\n# comment\n10.0.0.5 crt.sh Mirror.Local. # pinned\n::1 localhost\nbad line\n")
+    assert read_hosts(str(hosts)) == {
+        "localhost": ["127.0.0.1", "::1"],
+        "crt.sh": ["10.0.0.5"],
+        "mirror.local": ["10.0.0.5"],
+    }
+
+def test_hosts_entry_skips_nameservers():
+    cache = DNSCache(nameservers=["192.0.2.1"], hosts={"crt.sh": ["10.0.0.5"]})
+
+    async def fail(*args):
+        raise AssertionError("nameserver queried")
+
+    cache._query_type = fail
+    assert asyncio.run(cache.resolve("crt.sh")) == ["10.0.0.5"]
+
+def test_negative_answer_falls_back_to_system_resolver():
+    cache = DNSCache(nameservers=["192.0.2.1"], hosts={})
+
+    async def negative(name, qtype):
+        return [], 900
+
+    async def system(host):
+        return ["10.0.0.7"], cache.fallback_ttl
+
+    cache._query_type = negative
+    cache._getaddrinfo = system
+    assert asyncio.run(cache.resolve("split.internal.example")) == ["10.0.0.7"]
+    assert cache._entries["split.internal.example"][1] == cache.fallback_ttl
+
+def test_resolve_threadsafe_after_bind():
+    cache = DNSCache(nameservers=[], hosts={"whois.example": ["192.0.2.10"]})
+
+    async def main():
+        cache.bind(asyncio.get_running_loop())
+        return await asyncio.to_thread(cache.resolve_threadsafe, "whois.example")
+
+    assert asyncio.run(main()) == ["192.0.2.10"]
+
+def test_fallback_does_not_wait_on_a_full_default_pool(monkeypatch):
+    cache = DNSCache(nameservers=["192.0.2.1"], hosts={})
+
+    async def unreachable(name, qtype):
+        raise OSError("nameserver unreachable")
+
+    cache._query_type = unreachable
+    monkeypatch.setattr(socket, "getaddrinfo", lambda *args: [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.9", 0))])
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(2))
+        cache.bind(loop)
+        hosts = [f"host{i}.example" for i in range(4)]
+        return await asyncio.gather(*(asyncio.to_thread(cache.resolve_threadsafe, host, 3) for host in hosts))
+
+    start = time.monotonic()
+    assert asyncio.run(main()) == [["10.0.0.9"]] * 4
+    assert time.monotonic() - start < 2
+
+def test_connect_staggered_falls_back_to_next_address():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    port = listener.getsockname()[1]
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+    try:
+        sock, address = connect_staggered(["::1", "127.0.0.1"], port, timeout=2, delay=0.05)
+        assert address == "127.0.0.1" and sock.family == socket.AF_INET
+        sock.close()
+        with pytest.raises(OSError):
+            connect_staggered(["127.0.0.1"], closed_port, timeout=2)
+    finally:
+        listener.close()
+
+class FakeStream:
+    def __init__(self, address):
+        self.address = address
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+def racing_cache():
+    return DNSCache(nameservers=[], hosts={"race.example": ["10.0.0.1", "10.0.0.2"]})
+
+def test_connect_closes_streams_that_finish_while_cancelled():
+    cache = racing_cache()
+    opened = []
+
+    async def attempt(address):
+        stream = FakeStream(address)
+        opened.append(stream)
+        if address == "10.0.0.1":
+            await asyncio.sleep(0.02)
+            return stream
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            return stream
+
+    winner = asyncio.run(cache.connect("race.example", attempt, delay=0.01))
+    assert winner.address == "10.0.0.1" and not winner.closed
+    assert [stream.closed for stream in opened] == [False, True]
+
+def test_connect_closes_everything_when_cancelled():
+    cache = racing_cache()
+    opened = []
+
+    async def attempt(address):
+        stream = FakeStream(address)
+        opened.append(stream)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            return stream
+
+    async def main():
+        task = asyncio.ensure_future(cache.connect("race.example", attempt, delay=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert len(opened) == 2 and all(stream.closed for stream in opened)